@@ -10,12 +10,19 @@
 # (It's basically a bunch of regex matches and functional subs.)
 #
 import re
+from typing import Callable, Iterator
 from urllib.request import urlopen
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import cache
 from shutil import rmtree
 from pathlib import Path
+from time import time
+from hashlib import sha1
 
 
 repo = "https://raw.githubusercontent.com/libsdl-org/SDL/refs/heads/release-3.2.x/include/SDL3/"
+cache_dir = Path('.cache/')
+cache_ttl = 24 * 60 * 60
 
 includes = [
     # "SDL_stdinc.h",
@@ -76,6 +83,9 @@ includes = [
 ]
 
 
+match_camel_boundary = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+@cache
 def snake_case(string: str) -> str:
     # these do not follow the rules like the rest of the code or just would look weird otherwise
     special_cases = {
@@ -89,7 +99,7 @@ def snake_case(string: str) -> str:
     for k, v in special_cases.items():
         if k not in string: continue
         string = string.replace(k, v)
-    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])", "_", string).lower()
+    return match_camel_boundary.sub("_", string).lower()
 
 
 def capitalize(string: str) -> str:
@@ -101,9 +111,12 @@ def drop_prefix(string: str) -> str:
 
 # +------( heading )------+ #
 #
-def translate_heading(m: re.Match) -> str:
-    license = re.sub(r'^(?:  )?', r'# | ', m['license'], flags = re.MULTILINE)
-    filedoc = re.sub(r'^ \* ?', r'', m['filedoc'], flags = re.MULTILINE)
+match_license_indent = re.compile(r'^(?:  )?', flags = re.MULTILINE)
+match_filedoc_indent = re.compile(r'^ \* ?', flags = re.MULTILINE)
+
+def translate_heading(m: re.Match, doc: str | None) -> str:
+    license = match_license_indent.sub(r'# | ', m['license'])
+    filedoc = match_filedoc_indent.sub(r'', m['filedoc'])
     return (
 f'''# x--------------------------------------------------------------------------x #
 # | SDL3 Bindings in Mojo
@@ -157,16 +170,17 @@ type_map = {
 def translate_type(m: re.Match) -> str:
     result = m['type']
     result = result.replace(' *const', '').replace(' * const', '')
-    result = type_map.get(result) or result
+    result = type_map.get(result, result)
 
-    if m.groupdict().get('ptrs'):
-        for _ in range(len(m['ptrs'])):
-            result = f'Ptr[{result}, mut = {not bool(m['mut'])}]'
+    # union members have `amnt` instead of `mut`, `ptrs` and `vecs`
+    groups = m.re.groupindex
+    if 'ptrs' in groups and (ptrs := m['ptrs']):
+        result = 'Ptr[' * len(ptrs) + result + f', mut = {not bool(m['mut'])}]' * len(ptrs)
 
-    if m.groupdict().get('vecs'):
+    if 'vecs' in groups and m['vecs']:
         result = f'ArrayHelper[{result}, {m['vecs']}, mut = {not bool(m['mut'])}].result'
 
-    if m.groupdict().get('amnt'):
+    if 'amnt' in groups and m['amnt']:
         result = f'InlineArray[{result}, {m['amnt']}]'
 
     return drop_prefix(result)
@@ -182,22 +196,23 @@ def translate_return_type(m: re.Match) -> str:
 #
 match_return = re.compile(r'^(?P<mut>const )?(?P<type>.+?) ?(?P<ptrs>\**)(?:\[(?P<vecs>.*?)\])?$')
 match_variable = re.compile(r'^(?P<mut>const )?(?P<type>.+) (?P<ptrs>\**)(?P<name>\w+?)(?:\[(?P<vecs>.*?)\])?$')
-match_function_pointer = re.compile(r'^(?P<ret>.*?) \(SDLCALL \*(?P<name>\w*)\)\((?P<args>.*?)\)')
+match_function_pointer = re.compile(r'^(?P<fp_ret>.*?) \(SDLCALL \*(?P<fp_name>\w*)\)\((?P<fp_args>.*?)\)')
 
 def translate_variable(m: re.Match) -> str:
     return f'{snake_case(drop_prefix(m['name']))}: {translate_type(m)}'
 
 def translate_function_pointer(m: re.Match) -> str:
-    if m:
-        ret = translate_return_type(re.match(match_return, m['ret']))
-        args = re.sub(match_argument, translate_argument, m['args'])
-        return f'{snake_case(drop_prefix(m['name']))}: fn ({args}) -> {ret}'
+    ret = translate_return_type(match_return.match(m['fp_ret']))
+    args = ', '.join(translate_arguments(m['fp_args']))
+    return f'{snake_case(drop_prefix(m['fp_name']))}: fn ({args}) -> {ret}'
 
 
 # +------( docstring )------+ #
 #
 match_docblock_indent = re.compile(r'^ *\* ?', flags = re.MULTILINE)
 match_docblock_category = re.compile(r'^\\(?P<cat>\w+) (?P<body>[^\n]*\n?(?: [^\n]*\n)*)', flags = re.MULTILINE)
+match_docblock_continuation = re.compile(r'\n +')
+match_docblock_blank_lines = re.compile(r'\n *\n *\n')
 
 def doc_template(doc: str, name: str, ind: str = '') -> str:
     return (
@@ -209,7 +224,9 @@ f'''"""{doc}
 
 def format_docstring(string: str) -> str:
     if string:
-        string = re.sub(match_docblock_indent, '', string)
+        # skip the passes that have nothing to match, most enum and field docs are a single plain line
+        if '*' in string:
+            string = match_docblock_indent.sub('', string)
         first_param = True
 
         def translate_category(category: re.Match) -> str:
@@ -220,20 +237,25 @@ def format_docstring(string: str) -> str:
                     first_space = category.group('body').find(' ')
                     name = snake_case(category.group('body')[:first_space])
                     body = capitalize(category.group('body')[first_space:].strip(' '))
-                    body = re.sub(r'\n +', '\n' + (' '*(len(name) + 6)), body, flags = re.MULTILINE)
+                    body = match_docblock_continuation.sub('\n' + (' '*(len(name) + 6)), body)
                     result = ('Args:\n' if first_param else '') + '    ' + name + ': ' + body
                     first_param = False
                 case 'returns':
-                    result = f'\nReturns:\n    {re.sub(r'\n +', '\n    ', capitalize(category.group('body')), flags = re.MULTILINE)}'
+                    result = f'\nReturns:\n    {match_docblock_continuation.sub('\n    ', capitalize(category.group('body')))}'
                 case 'threadsafety':
-                    result = f'Safety:\n    {re.sub(r'\n +', '\n    ', capitalize(category.group('body')), flags = re.MULTILINE)}'
+                    result = f'Safety:\n    {match_docblock_continuation.sub('\n    ', capitalize(category.group('body')))}'
                 case _:
                     result = ''
             return result
             
-        string = re.sub(match_docblock_category, translate_category, string)
-        string = re.sub(r'\\', r'\\\\', string)
-        string = re.sub(r'\n *\n *\n', r'\n\n', string.strip(), flags = re.MULTILINE)
+        # these passes depend on each other's output, and folding them into one
+        # alternation is slower since it defeats the literal prefix search in `re`
+        if '\\' in string:
+            string = match_docblock_category.sub(translate_category, string)
+            string = string.replace('\\', '\\\\')
+        string = string.strip()
+        if string.count('\n') > 1:
+            string = match_docblock_blank_lines.sub(r'\n\n', string)
 
         # Capitalize first character and add a period to the first sentence
         end = string.find("\n\n")
@@ -245,24 +267,26 @@ def format_docstring(string: str) -> str:
 
 def format_docblock(string: str) -> str:
     if string:
-        doc = re.sub(match_docblock_category, '', string).strip()
+        doc = (match_docblock_category.sub('', string) if '\\' in string else string).strip()
         doc = format_docstring(doc)
-        return re.sub('\n', r'\n    ', doc, flags = re.MULTILINE)
+        return doc.replace('\n', '\n    ')
 
 
 def format_comblock(string: str) -> str:
     if string:
-        doc = re.sub(match_docblock_category, '', string).strip()
-        return re.sub('^', r'    # ', doc, flags = re.MULTILINE)
+        doc = (match_docblock_category.sub('', string) if '\\' in string else string).strip()
+        return '    # ' + doc.replace('\n', '\n    # ')
 
 
 # +------( typedef )------+ #
 #
 match_typedef_defines = re.compile(r'#define (?P<name>\w+)(?:\((?P<params>[^\n]+?)\))??  *(?P<expr>.+?) *(?:/\*\*< (?P<doc>.*?) \*/)?\n')
+match_uint64_literal = re.compile(r'SDL_UINT64_C\((\w*)\)')
+match_sdl_identifier = re.compile(r'\bSDL(\w*)\b')
 
-def translate_typedef(m: re.Match) -> str:
-    doc = format_docblock(m['doc'])
-    type = type_map.get(m['td_type']) or m['td_type']
+def translate_typedef(m: re.Match, doc: str | None) -> str:
+    doc = format_docblock(doc)
+    type = type_map.get(m['td_type'], m['td_type'])
     name = m['td_name']
     mojo_name = drop_prefix(name)
     ptr = m['td_ptr']
@@ -273,9 +297,9 @@ def translate_typedef(m: re.Match) -> str:
     def translate_def(m: re.Match) -> str:
         def_name = drop_prefix(m['name'])
         def_params = m['params']
-        def_expr = re.sub(r'SDL_UINT64_C\((\w*)\)', r'\1', m['expr'])
+        def_expr = match_uint64_literal.sub(r'\1', m['expr'])
         def_expr = def_expr.replace('u', '').lstrip('(').rstrip(')')
-        def_expr = re.sub(r'\bSDL(\w*)\b', r'Self.SDL\1.value', def_expr)
+        def_expr = match_sdl_identifier.sub(r'Self.SDL\1.value', def_expr)
         def_expr = drop_prefix(def_expr)
         def_doc = format_docblock(m['doc'])
         if def_params:
@@ -290,7 +314,7 @@ f'''
         else:
             return (f'    alias {def_name} = Self({def_expr})' + (f'\n    """{def_doc}"""' if def_doc else '') + '\n')
 
-    defs = re.sub(match_typedef_defines, translate_def, m['td_defs'])
+    defs = match_typedef_defines.sub(translate_def, m['td_defs'])
     return (
 f'''
 @register_passable("trivial")
@@ -319,48 +343,35 @@ struct {mojo_name}(Intable):
 
 # +------( enums )------+ #
 #
-match_enum_types = re.compile(r'^    ([\w]+?)(?: *= (-?[\w]+?))?,?(?:\n|$| */\*(?:\*<)?(.*?)\*/)', flags = re.MULTILINE | re.DOTALL)
-match_enum_comment = re.compile(r' */\*(?:([^\n]*)\*/\n|\*?(.*?)\*/)', flags = re.MULTILINE | re.DOTALL)
-running_enum_value = 0
-running_enum_base = 0
-
-def translate_enum_type(m: re.Match) -> str:
-    global running_enum_value, running_enum_base
-    name = m[1]
-    name = re.sub('(^[0-9]+$)', r'N\1', name)
-    value = m[2]
-    if value:
-        try:
-            value = value.replace('u', '')
-            running_enum_value = int(value, 0) + 1
-            running_enum_base = 16 if value.startswith('0x') else 10
-        except:
-            value = 'Self.' + value
-    else:
-        value = hex(running_enum_value) if running_enum_base == 16 else str(running_enum_value)
-        running_enum_value += 1
-    doc = format_docblock(m[3])
-    if 'Self.' not in value:
-        value = f'Self({value})'
-    res =  drop_prefix(f'    alias {name} = {value}\n')
-    if doc:
-        return res + f'    """{doc}"""'
-    return res
+match_enum_types = re.compile(r'^    (?P<type_name>[\w]+?)(?: *= (?P<type_value>-?[\w]+?))?,?(?:\n|$| */\*(?:\*<)?(?P<type_doc>.*?)\*/)', flags = re.MULTILINE | re.DOTALL)
+match_enum_comment = re.compile(r' */\*(?:(?P<line_comment>[^\n]*)\*/\n|\*?(?P<block_comment>.*?)\*/)', flags = re.MULTILINE | re.DOTALL)
+match_enum_numeric_name = re.compile(r'(^[0-9]+$)')
+match_enum_group_marker = re.compile(r'@[\{\}]')
 
 
 def translate_enum_comment(m: re.Match) -> str:
-    if m[1]:
+    if m['line_comment']:
         # single-line comment
-        if not re.search(r'@[\{\}]', m[1]):
-            return format_comblock(m[1]) + '\n'
-    elif m[2]:
+        if not match_enum_group_marker.search(m['line_comment']):
+            return format_comblock(m['line_comment']) + '\n'
+    elif m['block_comment']:
         # multi-line comment
-        return format_comblock(m[2])
+        return format_comblock(m['block_comment'])
     return ''
 
 
 match_enum_if = re.compile(r'^    #if (?P<cond>[^\n]+)\n(?P<true>(?:[^\n]+\n)+?)    #else\n(?P<false>(?:[^\n]+\n)+?)    #endif', re.MULTILINE)
-match_enum_if_type = re.compile(r'(?P<name>\w+) = (?P<val>\w+)')
+# one pass over the enum body, the outer group names which of the patterns above matched
+match_enum_body = re.compile(f'(?P<enum_if>{match_enum_if.pattern})|(?P<enum_type>{match_enum_types.pattern})|(?P<enum_comment>{match_enum_comment.pattern})', flags = re.MULTILINE | re.DOTALL)
+
+def enum_if_values(block: str) -> list[tuple[str, str]]:
+    # each line of an #if/#else branch is `    SDL_NAME = SDL_VALUE,`, maybe followed by a /**< doc */
+    values = []
+    for line in block.splitlines():
+        name, eq, value = line.strip().partition(' = ')
+        if eq and (value := value.split(',', 1)[0].split()):
+            values.append((name, value[0]))
+    return values
 
 def translate_enum_if(m: re.Match) -> str:
     cond = m['cond']
@@ -368,24 +379,45 @@ def translate_enum_if(m: re.Match) -> str:
         cond = 'is_big_endian()'
     elif cond == 'SDL_BYTEORDER == SDL_LIL_ENDIAN':
         cond = 'is_little_endian()'
-    
-    true_iter = re.finditer(match_enum_if_type, m['true'])
-    false_iter = re.finditer(match_enum_if_type, m['false'])
+
     result = ''
-    for false, true in zip(true_iter, false_iter):
-        result += f'    alias {false.group('name')} = Self.{false.group('val')} if {cond} else Self.{true.group('val')}\n'
+    for (name, true), (_, false) in zip(enum_if_values(m['true']), enum_if_values(m['false'])):
+        result += f'    alias {name} = Self.{true} if {cond} else Self.{false}\n'
     return drop_prefix(result)
 
-def translate_enum(m: re.Match) -> str:
-    global running_enum_value
-    running_enum_value = 0
-    doc = format_docblock(m['doc'])
+def translate_enum(m: re.Match, doc: str | None) -> str:
+    doc = format_docblock(doc)
     name = m['te_name']
     body = m['te_body']
+    running_value = 0
+    running_base = 10
+
+    def translate_enum_type(m: re.Match) -> str:
+        nonlocal running_value, running_base
+        name = m['type_name']
+        name = match_enum_numeric_name.sub(r'N\1', name)
+        value = m['type_value']
+        if value:
+            try:
+                value = value.replace('u', '')
+                running_value = int(value, 0) + 1
+                running_base = 16 if value.startswith('0x') else 10
+            except:
+                value = 'Self.' + value
+        else:
+            value = hex(running_value) if running_base == 16 else str(running_value)
+            running_value += 1
+        doc = format_docblock(m['type_doc'])
+        if 'Self.' not in value:
+            value = f'Self({value})'
+        res =  drop_prefix(f'    alias {name} = {value}\n')
+        if doc:
+            return res + f'    """{doc}"""'
+        return res
+
     # types = re.sub(f'(?:{name.upper()}|EVENT|CAPITALIZE)_', '', match.group('enum_body'))
-    body = re.sub(match_enum_if, translate_enum_if, body)
-    body = re.sub(match_enum_types, translate_enum_type, body)
-    body = re.sub(match_enum_comment, translate_enum_comment, body)
+    enum_translators = {'enum_if': translate_enum_if, 'enum_type': translate_enum_type, 'enum_comment': translate_enum_comment}
+    body = match_enum_body.sub(lambda m: enum_translators[m.lastgroup](m), body)
     return (
 f'''
 @register_passable("trivial")
@@ -415,25 +447,38 @@ struct {drop_prefix(name)}(Indexer, Intable):
 # +------( field )------+ #
 #
 match_field = re.compile(r'(?:^ */\*\*?\s*(?P<pre_doc>[\S\s]*?)\s*\*/\n)?    (?P<field>.+?); *(?:/\*\*< (?P<post_doc>[\S\s]*?) \*/)?', re.MULTILINE)
-match_multi_field = re.compile(r'    (.+?)((?: \*?\w+?,)+ \w+;)')
-
-def translate_field(field: re.Match) -> str:
-    var = translate_function_pointer(re.match(match_function_pointer, field.group('field'))) or translate_variable(re.match(match_variable, field.group('field')))
-    doc = format_docblock(field.group('pre_doc') or field.group('post_doc'))
+match_multi_field = re.compile(r'(.+?)((?: \*?\w+?,)+ \w+)')
+match_multi_field_name = re.compile(r' (\w+?)(?:,|$)')
+match_field_declaration = re.compile(f'(?P<function_pointer>{match_function_pointer.pattern})|(?P<variable>{match_variable.pattern})')
+
+def format_field(field: str, doc: str | None) -> str:
+    declaration = match_field_declaration.match(field)
+    if declaration.lastgroup == 'function_pointer':
+        var = translate_function_pointer(declaration)
+    else:
+        var = translate_variable(declaration)
+    doc = format_docblock(doc)
     return f'    var {var}' + (f'\n    """{doc}"""' if doc else '')
 
-def split_multifield(multifield: re.Match) -> str:
-    result = ''
-    for field in re.finditer(r' (\w+?)[,;]', multifield.group(2)):
-        result += f'    {multifield.group(1)} {field.group(1)};\n'
-    return result
+def translate_field(field: re.Match) -> str:
+    return format_field(field.group('field'), field.group('pre_doc') or field.group('post_doc'))
+
+def split_multifield(field: re.Match) -> str:
+    # `int x, y;` becomes one var per name, the doc before it goes on the first and the one after on the last
+    multifield = match_multi_field.fullmatch(field.group('field'))
+    if not multifield:
+        return translate_field(field)
+    names = [name.group(1) for name in match_multi_field_name.finditer(multifield.group(2))]
+    docs = [field.group('pre_doc')] + [None] * (len(names) - 1)
+    docs[-1] = docs[-1] or field.group('post_doc')
+    return ''.join(format_field(f'{multifield.group(1)} {name}', doc) + '\n' for (name, doc) in zip(names, docs))
 
 # +------( struct )------+ #
 #
-def translate_struct(m: re.Match) -> str:
-    doc = format_docblock(m['doc'])
+def translate_struct(m: re.Match, doc: str | None) -> str:
+    doc = format_docblock(doc)
     name = m['s_name']
-    body = re.sub(match_field, translate_field, m['s_body'])
+    body = match_field.sub(translate_field, m['s_body'])
     return (
 f'''
 @fieldwise_init
@@ -446,38 +491,37 @@ struct {drop_prefix(name)}(ImplicitlyCopyable, Movable):
 
 # +------( opaque struct )------+ #
 #
-def translate_opaque_struct(m: re.Match) -> str:
+def translate_opaque_struct(m: re.Match, doc: str | None) -> str:
     return (
 f'''
 @fieldwise_init
 struct {drop_prefix(m['os_name'])}(ImplicitlyCopyable, Movable):
-    {doc_template(format_docblock(m['doc']), m['os_name'], '    ')}
+    {doc_template(format_docblock(doc), m['os_name'], '    ')}
     pass
 ''')
 
 
 # +------( ptr struct )------+ #
 #
-def translate_ptr_struct(m: re.Match) -> str:
+def translate_ptr_struct(m: re.Match, doc: str | None) -> str:
     return (
 f'''
 alias {drop_prefix(m['ps_name'])} = Ptr[NoneType]
-{doc_template(format_docblock(m['doc']), m['ps_name'])}
+{doc_template(format_docblock(doc), m['ps_name'])}
 ''')
 
 
 # +------( typedef struct )------+ #
 #
-def translate_typedef_struct(m: re.Match) -> str:
-    doc = format_docblock(m['doc'])
+def translate_typedef_struct(m: re.Match, doc: str | None) -> str:
+    doc = format_docblock(doc)
     name = m['ts_name']
 
     if name == "SDL_GamepadBinding":
         return translate_gamepadbinding(doc)
     
     body = m['ts_body']
-    body = re.sub(match_multi_field, split_multifield, body)
-    body = re.sub(match_field, translate_field, body)
+    body = match_field.sub(split_multifield, body)
     if name == 'SDL_StorageInterface':
         body = body.replace('var copy: fn', 'var copy_file: fn')
     return (
@@ -494,10 +538,10 @@ struct {drop_prefix(m['ts_name'])}(ImplicitlyCopyable, Movable):
 #
 match_union_member = re.compile(r'^    (?P<type>\w+) (?P<name>\w+)(?:\[(?P<amnt>\d+)\])?.*?$', re.MULTILINE)
 
-def translate_union(m: re.Match) -> str:
+def translate_union(m: re.Match, doc: str | None) -> str:
     name = m['tu_name']
     body = ''
-    for member in re.finditer(match_union_member, m['tu_body']):
+    for member in match_union_member.finditer(m['tu_body']):
         body += '    ' + translate_type(member) + ', `, `,\n'
     body = body.removesuffix(' `, `,\n')
     return (
@@ -519,59 +563,76 @@ struct {drop_prefix(name)}:
 
 # +------( argument )------+ #
 #
-match_argument = re.compile(r'(?:(?<=,)|^)\s*(.+?)(?:(?=,)|$)')
 match_string_argument = re.compile(r'(\w+): Ptr\[c_char, mut = False\]')
-match_argument_names = re.compile(r'(, ?)?(\w+):.*?(?:(?=, \w*?:)|$)')
+c_string = 'Ptr[c_char, mut = False]'
 
-def translate_argument(arg: re.Match) -> str:
-    return "" if arg.group() == 'void' else (' ' + translate_variable(re.match(match_variable, arg.group(1))))
+def translate_arguments(args: str) -> list[str]:
+    # no argument in the SDL headers has a comma inside it, so splitting on commas is enough
+    if args in ('', 'void'):
+        return []
+    return [translate_variable(match_variable.match(arg.lstrip())) for arg in args.split(',')]
 
 
 # +------( function )------+ #
 #
-def fn_raises_template(doc: str, sdl_name: str, mojo_name: str, args: str, ret: str, call: str) -> str:
-    return (
-f'''
-fn {mojo_name}({args}{', ' * bool(args) * (ret != 'None')}{f'out ret: {ret}' * (ret != 'None')}) raises: 
-    {doc_template(doc, sdl_name, '    ')}
+fn_raises_source = '''
+fn {mojo_name}({args}) raises: 
+    {doc}
     ret = {call}
     if not ret:
         raise Error(String(unsafe_from_utf8_ptr=get_error()))
 
-''')
+'''
 
-def fn_template(doc: str, sdl_name: str, mojo_name: str, args: str, ret: str, call: str) -> str:
-    return (
-f'''
+fn_source = '''
 fn {mojo_name}({args}) -> {ret}: 
-    {doc_template(doc, sdl_name, '    ')}
+    {doc}
     return {call}
 
-''')
+'''
+
+def fn_raises_template(doc: str, sdl_name: str, mojo_name: str, args: str, ret: str, call: str) -> str:
+    if ret != 'None':
+        args = f'{args}, out ret: {ret}' if args else f'out ret: {ret}'
+    return fn_raises_source.format(mojo_name = mojo_name, args = args, doc = doc_template(doc, sdl_name, '    '), call = call)
 
-def translate_function(m: re.Match):
+def fn_template(doc: str, sdl_name: str, mojo_name: str, args: str, ret: str, call: str) -> str:
+    return fn_source.format(mojo_name = mojo_name, args = args, ret = ret, doc = doc_template(doc, sdl_name, '    '), call = call)
+
+match_returns_success = re.compile(r'Returns:\n        True on success')
+match_success_clause = re.compile(r'True on success.*?false (.*)')
+match_on_failure = re.compile(r'on failure;')
+
+def translate_function(m: re.Match, doc: str | None):
     if m.group('f_attr') and ('VARARG' in m.group('f_attr')):
         # handle variadic functions
         return ''
-    doc = format_docblock(m['doc'])
+    doc = format_docblock(doc)
     sdl_name = m.group('f_name')
     mojo_name = snake_case(drop_prefix(sdl_name))
-    sdl_ret = translate_return_type(re.match(match_return, m.group('f_ret')))
-    mojo_ret = re.sub(match_string_argument, r'String', sdl_ret)
-    sdl_args = re.sub(match_argument, translate_argument, m.group('f_args')).removeprefix(' ')
-    mojo_args = re.sub(match_string_argument, r'var \1: String', sdl_args)
-    pass_args = re.sub(match_argument_names, r'\1\2', sdl_args)
-    for arg_name in re.finditer(r'\w+(?=: String)', mojo_args):
-        pass_args = re.sub(r'\b' + arg_name[0] + r'\b', arg_name[0] + '.unsafe_cstr_ptr()', pass_args)
+    sdl_ret = translate_return_type(match_return.match(m.group('f_ret')))
+    mojo_ret = match_string_argument.sub(r'String', sdl_ret)
+    sdl_args = translate_arguments(m.group('f_args'))
+    mojo_args = []
+    pass_args = []
+    for arg in sdl_args:
+        name, _, type = arg.partition(': ')
+        if type == c_string:
+            mojo_args.append(f'var {name}: String')
+            pass_args.append(name + '.unsafe_cstr_ptr()')
+        else:
+            mojo_args.append(arg)
+            pass_args.append(name)
+    sdl_args, mojo_args, pass_args = ', '.join(sdl_args), ', '.join(mojo_args), ', '.join(pass_args)
     call = f'_get_sdl_handle()[].get_function[fn ({sdl_args}) -> {sdl_ret}]("{sdl_name}")({pass_args})'
     if mojo_ret == 'String':
         call = 'String(unsafe_from_utf8_ptr=' + call + ')'
-    if re.search('Returns:\n        True on success', doc) and (mojo_ret == 'Bool'):
+    if match_returns_success.search(doc) and (mojo_ret == 'Bool'):
         doc = doc.replace('Returns', 'Raises')
-        doc = re.sub(r'True on success.*?false (.*)', r'Raises \1', doc)
+        doc = match_success_clause.sub(r'Raises \1', doc)
         mojo_ret = "None"
         return fn_raises_template(doc, sdl_name, mojo_name, mojo_args, mojo_ret, call)
-    elif re.search(r'on failure;', doc, re.MULTILINE) and (mojo_ret.startswith('Ptr') or mojo_ret.startswith('String')):
+    elif match_on_failure.search(doc) and (mojo_ret.startswith('Ptr') or mojo_ret.startswith('String')):
         return fn_raises_template(doc, sdl_name, mojo_name, mojo_args, mojo_ret, call)
     else:
         return fn_template(doc, sdl_name, mojo_name, mojo_args, mojo_ret, call)
@@ -579,11 +640,11 @@ def translate_function(m: re.Match):
 
 # +------( typedef function )------+ #
 #
-def translate_typedef_function(m: re.Match):
-    doc = format_docblock(m['doc'])
+def translate_typedef_function(m: re.Match, doc: str | None):
+    doc = format_docblock(doc)
     name = m['tf_name']
-    ret = translate_return_type(re.match(match_return, m['tf_ret']))
-    args = re.sub(match_argument, translate_argument, m['tf_args']).removeprefix(' ')
+    ret = translate_return_type(match_return.match(m['tf_ret']))
+    args = ', '.join(translate_arguments(m['tf_args']))
     f_type = f'fn ({args}) -> {ret}'
     if m['tf_ptr']:
         f_type = f'Ptr[{f_type}]'
@@ -684,15 +745,53 @@ patterns = {
     "typedef_function": (r'^typedef (?:const )?(?P<tf_ret>.+?) ?(?P<tf_ptr>\*)?\(SDLCALL \*(?P<tf_name>\w+)\)\((?P<tf_args>.+?)\);', translate_typedef_function),
     }
 
-regex = re.compile(r'(?:^/\*\*\n(?>(?P<doc>.*?)\n \*/\n))?(?:' + '|'.join('(?P<%s>%s)' % (key, val[0]) for (key, val) in patterns.items()) + ')', flags = re.MULTILINE | re.DOTALL)
+match_doc = re.compile(r'^/\*\*\n(?P<doc>.*?)\n \*/\n', flags = re.MULTILINE | re.DOTALL)
+translators = [(re.compile(pattern, flags = re.MULTILINE | re.DOTALL), translate) for (pattern, translate) in patterns.values()]
 
 
-def get_src(url: str, out: Path):
-    with urlopen(repo + include) as src:
-        out.unlink(missing_ok = True)
-        with open(out, 'a') as out:
-            for match in re.finditer(regex, src.read().decode('utf-8')):
-                out.write(patterns[match.lastgroup][1](match))
+def match_declaration(src: str, pos: int) -> tuple[re.Match, Callable] | None:
+    for (pattern, translate) in translators:
+        if m := pattern.match(src, pos):
+            return m, translate
+
+
+def scan(src: str) -> Iterator[tuple[re.Match, str | None, Callable]]:
+    # Every declaration starts at the beginning of a line, optionally preceded by a
+    # /** doc */ block, so try each pattern there and otherwise skip to the next line.
+    pos = 0
+    while pos < len(src):
+        doc = match_doc.match(src, pos)
+        found = doc and match_declaration(src, doc.end())
+        if found:
+            yield found[0], doc['doc'], found[1]
+        elif found := match_declaration(src, pos):
+            yield found[0], None, found[1]
+        else:
+            pos = src.find('\n', pos) + 1 or len(src)
+            continue
+        pos = found[0].end()
+
+
+def fetch(url: str) -> str:
+    # downloaded headers are kept in cache_dir for a day, so re-running the generator stays offline
+    # keyed by repo too, so pointing repo at another branch doesn't reuse the old headers
+    cached = cache_dir / sha1(repo.encode()).hexdigest()[:12] / url
+    if cached.exists() and (time() - cached.stat().st_mtime) < cache_ttl:
+        return cached.read_bytes().decode('utf-8')
+    # read the whole header up front so the connection is released before translating
+    with urlopen(repo + url) as response:
+        data = response.read()
+    cached.parent.mkdir(parents = True, exist_ok = True)
+    # write next to it and swap in, so an interrupted run can't leave a truncated header behind
+    partial = cached.with_name(cached.name + '.part')
+    partial.write_bytes(data)
+    partial.replace(cached)
+    return data.decode('utf-8')
+
+
+def get_src(url: str) -> str:
+    src = fetch(url)
+    return ''.join([translate(m, doc) for (m, doc, translate) in scan(src)])
 
 out_dir = Path('src/')
 rmtree(out_dir, ignore_errors=True)
@@ -707,10 +806,13 @@ with open(out_dir / '__init__.mojo', 'w') as imp:
 """SDL3 Bindings in Mojo"""
 
 ''')
-    for include in includes:
-        out = out_dir / (include.lower().removesuffix('.h') + '.mojo')
-        get_src(include, out)
-        print('translating ' + str(out))
+    outs = [out_dir / (include.lower().removesuffix('.h') + '.mojo') for include in includes]
+    with ThreadPoolExecutor(max_workers = 16) as pool:
+        jobs = {pool.submit(get_src, include): out for (include, out) in zip(includes, outs)}
+        for job in as_completed(jobs):
+            jobs[job].write_text(job.result())
+            print('translated ' + str(jobs[job]))
+    for out in outs:
         imp.write(f'from .{out.stem} import *\n')
     imp.write(
 f'''